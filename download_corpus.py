@@ -10,20 +10,31 @@ Document types:
     - prop: Propositioner (government bills)
 
 Usage:
-    python download_corpus.py [--dry-run] [--limit N]
+    python download_corpus.py [--dry-run] [--limit N] [--format {txt,ndjson}]
 
 Author: Simon Lindgren
 Date: 2026-01
 """
 
 import httpx
+import orjson
+import zstandard
 import asyncio
 import argparse
-import json
+import hashlib
+import math
+import os
+import random
+import re
 from pathlib import Path
+from collections import deque
+from contextlib import AsyncExitStack, aclosing
 from datetime import datetime
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from typing import (
+    AsyncIterator, Awaitable, BinaryIO, Callable, Optional, TypeVar
+)
 
 
 # Configuration
@@ -40,7 +51,34 @@ DOCUMENT_TYPES = {
 DATE_FROM = "1990-01-01"  # Exclude older OCR'd documents with false positives
 
 BASE_URL = "https://data.riksdagen.se"
+MAX_CONCURRENT_DOWNLOADS = 10  # Be polite to the API
+PAGE_SIZE = 100
+PREFETCH_PAGES = 4  # Metadata pages requested ahead of the one being processed
+CHUNK_SIZE = 64 * 1024
+MAX_RETRIES = 3  # Retries for transient errors (timeouts, 429, 5xx)
+MAX_RETRY_DELAY = 10.0  # Seconds
 DATA_DIR = Path(__file__).parent / "data"
+NDJSON_FILENAME = "corpus.ndjson.zst"  # Per document type, with --format ndjson
+NDJSON_FRAME_RECORDS = 50  # Records per compressed frame
+NDJSON_READ_SIZE = 1024 * 1024  # Bytes read at a time when indexing
+
+# MD5 digests of saved content, kept in each document type's folder (one
+# file per output format), so motioner and propositioner are deduplicated
+# separately
+HASHES_FILENAMES = {
+    "txt": ".hashes",
+    "ndjson": ".hashes-ndjson",
+}
+
+# Anything but letters, digits, space, hyphen and underscore
+UNSAFE_FILENAME_CHARS = re.compile(r"[^\w \-]")
+
+
+class Outcome(Enum):
+    """Result of downloading and saving one document."""
+    DOWNLOADED = "downloaded"
+    DUPLICATE = "duplicate"
+    FAILED = "failed"
 
 
 @dataclass
@@ -50,20 +88,285 @@ class DownloadStats:
     downloaded: int = 0
     failed: int = 0
     skipped: int = 0
+    duplicates: int = 0
+
+    def count(self, outcome: Outcome) -> None:
+        """Increment the counter for a download outcome."""
+        if outcome is Outcome.DOWNLOADED:
+            self.downloaded += 1
+        elif outcome is Outcome.DUPLICATE:
+            self.duplicates += 1
+        elif outcome is Outcome.FAILED:
+            self.failed += 1
+
+    def __add__(self, other: "DownloadStats") -> "DownloadStats":
+        return DownloadStats(*(
+            getattr(self, f.name) + getattr(other, f.name)
+            for f in fields(self)
+        ))
+
+
+@dataclass
+class Progress:
+    """Download progress for one document type."""
+    done: int = 0
+    total: Optional[int] = None  # Known once the searches have finished
+
+    def advance(self) -> None:
+        """Count one processed document, reporting every 50."""
+        self.done += 1
+        if self.done % 50 == 0 or self.done == self.total:
+            self.report()
+
+    def finish_search(self, total: int) -> None:
+        """Set the number of documents to process once it is known."""
+        self.total = total
+        if total and self.done == total:
+            self.report()
+
+    def report(self) -> None:
+        if self.total is None:
+            print(f"    Progress: {self.done:,} (still searching)")
+        else:
+            print(f"    Progress: {self.done:,}/{self.total:,}")
+
+
+@dataclass
+class ContentHashes:
+    """
+    MD5 digests of saved document contents, persisted between runs.
+
+    The file has one "<digest> <document ID>" line per document that was
+    saved, or dropped as a duplicate of a saved one. Entries only count
+    while the saved document is still on disk, so deleting a document
+    lets it (and its duplicates) be downloaded again.
+    """
+    path: Path
+    owners: dict[bytes, str] = field(default_factory=dict)  # digest -> ID
+    duplicate_ids: set[str] = field(default_factory=set)
+
+    @classmethod
+    def load(cls, path: Path, saved_ids: set[str]) -> "ContentHashes":
+        """Load entries from earlier runs, given the IDs saved on disk."""
+        entries = []
+        if path.exists():
+            for line in path.read_text().splitlines():
+                digest, _, doc_id = line.partition(" ")
+                try:
+                    entries.append((bytes.fromhex(digest), doc_id))
+                except ValueError:  # Line cut short by an interrupted run
+                    continue
+
+        owners = {
+            digest: doc_id
+            for digest, doc_id in entries
+            if doc_id in saved_ids
+        }
+        duplicate_ids = {
+            doc_id
+            for digest, doc_id in entries
+            if owners.get(digest, doc_id) != doc_id
+        }
+        return cls(path, owners, duplicate_ids)
+
+    def claim(self, digest: bytes, doc_id: str) -> bool:
+        """
+        Reserve digest for doc_id before saving the document.
+
+        Returns False if a document with the same content has already been
+        saved (or is being saved).
+        """
+        return self.owners.setdefault(digest, doc_id) == doc_id
+
+    def release(self, digest: bytes) -> None:
+        """Give up a claim whose document could not be saved."""
+        self.owners.pop(digest, None)
+
+    async def record(self, digest: bytes, doc_id: str) -> None:
+        """Persist that doc_id was saved, or dropped as a duplicate."""
+        if self.owners.get(digest) != doc_id:
+            self.duplicate_ids.add(doc_id)
+
+        def append() -> None:
+            with self.path.open("a") as f:
+                f.write(f"{digest.hex()} {doc_id}\n")
+
+        await asyncio.to_thread(append)
+
+
+@dataclass
+class NdjsonCorpus:
+    """
+    Zstandard-compressed NDJSON file holding one document per line.
+
+    Records are written in frames of NDJSON_FRAME_RECORDS lines. A frame
+    only counts once it is complete, so a run that is killed loses at most
+    its last unfinished frame, which the next run cuts off and downloads
+    again.
+    """
+    path: Path
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    writer: Optional[BinaryIO] = None
+    valid_size: Optional[int] = None  # Bytes of complete frames (see ids)
+    pending: list[Callable[[], Awaitable[None]]] = field(default_factory=list)
+
+    def ids(self) -> set[str]:
+        """Collect IDs of documents in the complete frames of the file."""
+        ids = set()
+        self.valid_size = 0
+        if not self.path.exists():
+            return ids
+
+        decompressor = zstandard.ZstdDecompressor()
+        frame = decompressor.decompressobj()
+        lines = bytearray()
+        end = 0  # Bytes read so far
+        with self.path.open("rb") as f:
+            while chunk := f.read(NDJSON_READ_SIZE):
+                end += len(chunk)
+                # A chunk can finish one frame and start (or hold) the next
+                while chunk:
+                    try:
+                        lines += frame.decompress(chunk)
+                    except zstandard.ZstdError:
+                        return ids
+                    if not frame.eof:
+                        break
+
+                    ids.update(orjson.loads(line)["id"] for line in lines.splitlines())
+                    chunk = frame.unused_data
+                    self.valid_size = end - len(chunk)
+                    frame = decompressor.decompressobj()
+                    lines.clear()
+
+        # Anything past valid_size is a frame cut short by an interrupted run
+        return ids
+
+    def open_writer(self) -> BinaryIO:
+        """Open the file for appending, dropping any incomplete frame."""
+        if self.valid_size is None:
+            self.ids()
+
+        f = self.path.open("ab")
+        f.truncate(self.valid_size)
+        return zstandard.ZstdCompressor().stream_writer(f)
+
+    async def append(
+        self,
+        record: dict,
+        on_saved: Callable[[], Awaitable[None]],
+    ) -> None:
+        """
+        Append record as one JSON line, opening the file on first use.
+
+        on_saved is awaited once the frame holding the record is complete
+        on disk.
+        """
+        line = orjson.dumps(record) + b"\n"
+
+        # The compressor isn't thread-safe, so writes take turns
+        async with self.lock:
+            if self.writer is None:
+                self.writer = await asyncio.to_thread(self.open_writer)
+            await asyncio.to_thread(self.writer.write, line)
+
+            self.pending.append(on_saved)
+            if len(self.pending) >= NDJSON_FRAME_RECORDS:
+                await asyncio.to_thread(self.flush)
+                await self.saved()
+
+    def flush(self) -> None:
+        """End the current frame and push it to the file."""
+        self.writer.flush(zstandard.FLUSH_FRAME)
+
+    async def saved(self) -> None:
+        """Run the callbacks of records in frames that are complete."""
+        pending, self.pending = self.pending, []
+        for on_saved in pending:
+            await on_saved()
+
+    async def close(self) -> None:
+        """Finish the last frame and close the file."""
+        if self.writer is None:
+            return
+
+        # Synchronous so it completes even while a cancellation unwinds
+        self.flush()
+        self.writer.close()
+        self.writer = None
+        await self.saved()
 
 
 def sanitise_filename(text: str, max_length: int = 30) -> str:
     """Create a safe filename from text."""
-    safe = "".join(c for c in text if c.isalnum() or c in " -_")
+    safe = UNSAFE_FILENAME_CHARS.sub("", text)
     return safe[:max_length].strip()
 
 
+T = TypeVar("T")
+
+
+def is_transient(error: httpx.HTTPError) -> bool:
+    """Whether a failed request is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status in (408, 429) or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def retry_delay(error: httpx.HTTPError, attempt: int) -> float:
+    """Seconds to wait before the next attempt."""
+    # Honour the server's Retry-After (in seconds) when rate limited
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_DELAY)
+
+    # Exponential backoff with jitter: 0.5s, 1s, 2s, ...
+    delay = 0.5 * 2 ** attempt
+    return min(delay + random.uniform(0, delay), MAX_RETRY_DELAY)
+
+
+async def with_retries(request: Callable[[], Awaitable[T]]) -> T:
+    """
+    Await request(), retrying transient HTTP errors with backoff.
+
+    Raises:
+        httpx.HTTPError: If the error is permanent (e.g. 404) or retries
+            are exhausted
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await request()
+        except httpx.HTTPError as error:
+            if attempt == MAX_RETRIES or not is_transient(error):
+                raise
+            await asyncio.sleep(retry_delay(error, attempt))
+
+
+async def run_all(*coros: Awaitable[None]) -> None:
+    """
+    Run coroutines concurrently until all are done.
+
+    The first failure cancels the others and is re-raised, so nothing is
+    left waiting on a coroutine that has died.
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
 async def fetch_document_list(
     client: httpx.AsyncClient,
     search_term: str,
     doc_type: str,
     page: int = 1,
-    page_size: int = 100,
+    page_size: int = PAGE_SIZE,
 ) -> tuple[list[dict], int]:
     """
     Fetch a page of document metadata from the Riksdag API.
@@ -82,9 +385,13 @@ async def fetch_document_list(
         "sz": page_size,
     }
 
-    response = await client.get(f"{BASE_URL}/dokumentlista/", params=params)
-    response.raise_for_status()
-    data = response.json()
+    async def request() -> httpx.Response:
+        response = await client.get(f"{BASE_URL}/dokumentlista/", params=params)
+        response.raise_for_status()
+        return response
+
+    response = await with_retries(request)
+    data = orjson.loads(response.content)
 
     if "dokumentlista" not in data:
         return [], 0
@@ -99,73 +406,185 @@ async def fetch_document_list(
     return docs, total_hits
 
 
-async def fetch_all_documents(
+async def iter_document_pages(
     client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
     search_term: str,
     doc_type: str,
     limit: Optional[int] = None,
-) -> list[dict]:
-    """Fetch all document metadata with pagination."""
-    all_docs = []
-    page = 1
+) -> AsyncIterator[list[dict]]:
+    """
+    Yield pages of document metadata in order (newest first).
 
-    while True:
+    The first page tells us the total number of hits, so up to
+    PREFETCH_PAGES of the following pages are requested concurrently
+    (bounded by semaphore) while the caller works through the current one.
+    """
+    async def fetch_page(page: int) -> list[dict]:
+        async with semaphore:
+            docs, _ = await fetch_document_list(
+                client, search_term, doc_type, page
+            )
+        return docs
+
+    async with semaphore:
         docs, total_hits = await fetch_document_list(
-            client, search_term, doc_type, page
+            client, search_term, doc_type, 1
         )
 
-        if not docs:
-            break
-
-        all_docs.extend(docs)
-        print(f"      Page {page}: {len(docs)} docs (total: {len(all_docs):,}/{total_hits:,})")
+    wanted = min(total_hits, limit) if limit else total_hits
+    num_pages = math.ceil(wanted / PAGE_SIZE)
+    print(f"      '{search_term}': {total_hits:,} hits, {max(num_pages, 1)} page(s)")
 
-        if len(docs) < 100:  # Last page
-            break
+    pending: deque[asyncio.Task[list[dict]]] = deque()
+    next_page = 2
 
-        if limit and len(all_docs) >= limit:
-            all_docs = all_docs[:limit]
-            break
+    def prefetch() -> None:
+        nonlocal next_page
+        while next_page <= num_pages and len(pending) < PREFETCH_PAGES:
+            pending.append(asyncio.create_task(fetch_page(next_page)))
+            next_page += 1
 
-        page += 1
-        await asyncio.sleep(0.1)  # Be polite to the API
+    remaining = wanted
+    try:
+        while True:
+            prefetch()
+            yield docs[:remaining]
+            remaining -= len(docs)
 
-    return all_docs
+            if not pending:
+                break
+            docs = await pending.popleft()
+    finally:
+        for page in pending:
+            page.cancel()
 
 
-async def download_document_content(
+async def iter_document_content(
     client: httpx.AsyncClient,
     doc_id: str,
-) -> Optional[str]:
-    """Download the full text content of a document."""
+) -> AsyncIterator[bytes]:
+    """
+    Stream the full text content of a document in chunks.
+
+    Raises:
+        httpx.HTTPError: If a request fails
+    """
     # Try HTML format first (most complete)
     url = f"{BASE_URL}/dokument/{doc_id}"
 
-    try:
-        response = await client.get(url)
+    async with client.stream("GET", url) as response:
         response.raise_for_status()
-        content = response.text
-
-        # If we got XML metadata instead of content, try text format
-        if "<dokumentstatus>" in content and len(content) < 5000:
-            text_url = f"{BASE_URL}/dokument/{doc_id}.text"
-            response = await client.get(text_url)
-            response.raise_for_status()
-            content = response.text
+        chunks = response.aiter_bytes(CHUNK_SIZE)
+
+        # Buffer enough of the body to recognise a bare metadata response
+        head = b""
+        async for chunk in chunks:
+            head += chunk
+            if len(head) >= 5000:
+                break
+
+        if b"<dokumentstatus>" not in head or len(head) >= 5000:
+            yield head
+            async for chunk in chunks:
+                yield chunk
+            return
+
+    # If we got XML metadata instead of content, try text format
+    text_url = f"{BASE_URL}/dokument/{doc_id}.text"
+    async with client.stream("GET", text_url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+            yield chunk
 
-        return content
 
-    except httpx.HTTPError:
-        return None
+async def download_document_content(
+    client: httpx.AsyncClient,
+    doc_id: str,
+    filepath: Path,
+    header: str,
+    hashes: ContentHashes,
+) -> Outcome:
+    """
+    Stream the full text content of a document to filepath after header.
 
+    The body is written to a .part file that is only renamed into place
+    once complete, so an interrupted download is never mistaken for a
+    finished one on the next run. Content identical to a document saved
+    before (by MD5 of the body, excluding the header) is discarded.
 
-def save_document(
-    content: str,
+    Returns:
+        Whether the document was downloaded, dropped as a duplicate or failed
+    """
+    partial = filepath.with_name(filepath.name + ".part")
+
+    # File operations run in worker threads so they don't block the event loop
+    f = await asyncio.to_thread(partial.open, "wb")
+
+    async def write_content() -> tuple[int, bytes]:
+        # Start over on every attempt, discarding any partial body
+        await asyncio.to_thread(f.seek, 0)
+        await asyncio.to_thread(f.truncate)
+        await asyncio.to_thread(f.write, header.encode("utf-8"))
+
+        md5 = hashlib.md5()
+        size = 0
+        async with aclosing(iter_document_content(client, doc_id)) as chunks:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+                md5.update(chunk)
+                size += len(chunk)
+        return size, md5.digest()
+
+    saved = False
+    try:
+        try:
+            size, digest = await with_retries(write_content)
+        except httpx.HTTPError:
+            return Outcome.FAILED
+        finally:
+            f.close()
+
+        if not size:
+            return Outcome.FAILED
+
+        if not hashes.claim(digest, doc_id):
+            await hashes.record(digest, doc_id)
+            return Outcome.DUPLICATE
+
+        # Rename synchronously so a cancellation can't leave us unsure
+        # whether the file was saved
+        try:
+            partial.replace(filepath)
+        except BaseException:
+            hashes.release(digest)
+            raise
+        saved = True
+
+        # Only record the digest once the document is actually on disk
+        await hashes.record(digest, doc_id)
+        return Outcome.DOWNLOADED
+    finally:
+        # Never leave a .part file behind, whatever went wrong (disk errors,
+        # cancellation, Ctrl-C); cleanup is synchronous so it can't be
+        # interrupted itself
+        if not saved:
+            partial.unlink(missing_ok=True)
+
+
+async def save_document(
+    client: httpx.AsyncClient,
     metadata: dict,
     search_term: str,
     output_dir: Path,
-) -> Path:
-    """Save document with metadata header."""
+    hashes: ContentHashes,
+) -> Outcome:
+    """
+    Download a document and save it with metadata header.
+
+    Returns:
+        Outcome of the download (see download_document_content)
+    """
     doc_id = metadata.get("id", "unknown")
     title = metadata.get("titel", "untitled")
     date_str = metadata.get("datum", "")[:10].replace("-", "")
@@ -189,13 +608,173 @@ DOWNLOADED: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 """
 
-    filepath.write_text(header + content, encoding="utf-8")
-    return filepath
+    return await download_document_content(
+        client, doc_id, filepath, header, hashes
+    )
+
+
+async def save_document_record(
+    client: httpx.AsyncClient,
+    metadata: dict,
+    search_term: str,
+    corpus: NdjsonCorpus,
+    hashes: ContentHashes,
+) -> Outcome:
+    """
+    Download a document and append it to corpus as one JSON record.
+
+    Returns:
+        Outcome of the download (see download_document_content)
+    """
+    doc_id = metadata.get("id", "unknown")
+
+    async def read_content() -> bytes:
+        async with aclosing(iter_document_content(client, doc_id)) as chunks:
+            return b"".join([chunk async for chunk in chunks])
+
+    try:
+        content = await with_retries(read_content)
+    except httpx.HTTPError:
+        return Outcome.FAILED
+
+    if not content:
+        return Outcome.FAILED
+
+    digest = hashlib.md5(content).digest()
+    if not hashes.claim(digest, doc_id):
+        await hashes.record(digest, doc_id)
+        return Outcome.DUPLICATE
+
+    record = {
+        "id": doc_id,
+        "search_term": search_term,
+        "downloaded": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "metadata": {
+            key: value
+            for key, value in metadata.items()
+            if not key.startswith("_")
+        },
+        "content": content.decode("utf-8", errors="replace"),
+    }
+    try:
+        # The digest is recorded once the record's frame is on disk
+        await corpus.append(record, lambda: hashes.record(digest, doc_id))
+    except BaseException:
+        hashes.release(digest)
+        raise
+
+    return Outcome.DOWNLOADED
+
+
+def existing_document_ids(output_dir: Path) -> set[str]:
+    """Collect IDs of documents already saved in output_dir."""
+    # Filenames follow {date}_{type}_{id}_{title}.txt (see save_document)
+    with os.scandir(output_dir) as entries:
+        return {
+            parts[2]
+            for entry in entries
+            if entry.name.endswith(".txt")
+            and len(parts := entry.name.split("_", 3)) == 4
+        }
+
+
+async def buffer_pages(
+    pages: AsyncIterator[list[dict]],
+    buffer: asyncio.Queue[Optional[list[dict]]],
+) -> None:
+    """Move pages into buffer as they arrive, followed by None."""
+    async with aclosing(pages):
+        async for docs in pages:
+            await buffer.put(docs)
+    await buffer.put(None)
+
+
+async def find_new_documents(
+    searches: dict[str, asyncio.Queue[Optional[list[dict]]]],
+    existing_ids: set[str],
+    hashes: ContentHashes,
+    queue: Optional[asyncio.Queue[Optional[dict]]],
+    num_workers: int,
+    stats: DownloadStats,
+    progress: Progress,
+) -> None:
+    """
+    Queue new documents from the search results for download.
+
+    searches maps each search term to the buffer its pages arrive in
+    (see buffer_pages). Documents without ID, already saved or known to duplicate saved
+    content are counted but not queued. Once the searches are done, one
+    None per download worker tells the workers to stop. Without a queue
+    (dry run), documents are only counted.
+    """
+    ids_seen: set[str] = set()
+    queued = 0
+
+    # The searches run concurrently, but their results are taken in
+    # SEARCH_TERMS order, so a document matching several terms is always
+    # attributed to the first of them
+    for search_term, pages in searches.items():
+        while (docs := await pages.get()) is not None:
+            # Track unique documents (avoid duplicates across search terms)
+            for doc in docs:
+                doc_id = doc.get("id", "")
+                if doc_id in ids_seen:
+                    continue
+                ids_seen.add(doc_id)
+                doc["_search_term"] = search_term
+                stats.total_found += 1
+
+                if not doc_id or doc_id in existing_ids:
+                    stats.skipped += 1
+                elif doc_id in hashes.duplicate_ids:
+                    stats.duplicates += 1
+                elif queue is not None:
+                    await queue.put(doc)
+                    queued += 1
+
+    progress.finish_search(queued)
+    for _ in range(num_workers):
+        await queue.put(None)
+
+
+async def download_documents(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    queue: asyncio.Queue[Optional[dict]],
+    output_dir: Path,
+    corpus: Optional[NdjsonCorpus],
+    hashes: ContentHashes,
+    stats: DownloadStats,
+    progress: Progress,
+) -> None:
+    """Download queued documents until a None arrives."""
+    while (doc := await queue.get()) is not None:
+        async with semaphore:
+            if corpus is not None:
+                outcome = await save_document_record(
+                    client,
+                    doc,
+                    doc["_search_term"],
+                    corpus,
+                    hashes,
+                )
+            else:
+                outcome = await save_document(
+                    client,
+                    doc,
+                    doc["_search_term"],
+                    output_dir,
+                    hashes,
+                )
+
+        stats.count(outcome)
+        progress.advance()
 
 
 async def download_corpus(
     dry_run: bool = False,
     limit: Optional[int] = None,
+    output_format: str = "txt",
 ) -> dict[str, DownloadStats]:
     """
     Download the complete corpus for all document types and search terms.
@@ -203,13 +782,26 @@ async def download_corpus(
     Args:
         dry_run: If True, only count documents without downloading
         limit: Maximum documents per type/term combination (for testing)
+        output_format: "txt" for one file per document, "ndjson" for a
+            single compressed NDJSON file per document type
 
     Returns:
         Dictionary of stats per document type
     """
     stats = {doc_type: DownloadStats() for doc_type in DOCUMENT_TYPES}
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+    limits = httpx.Limits(
+        max_connections=MAX_CONCURRENT_DOWNLOADS,
+        max_keepalive_connections=MAX_CONCURRENT_DOWNLOADS,
+    )
+
+    async with AsyncExitStack() as stack:
+        # HTTP/2 multiplexes concurrent requests over a single connection
+        client = await stack.enter_async_context(httpx.AsyncClient(
+            http2=True, timeout=60.0, limits=limits
+        ))
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
         for doc_type, folder_name in DOCUMENT_TYPES.items():
             output_dir = DATA_DIR / folder_name
             output_dir.mkdir(parents=True, exist_ok=True)
@@ -218,60 +810,76 @@ async def download_corpus(
             print(f"Document type: {doc_type} -> {folder_name}/")
             print(f"{'=' * 60}")
 
-            type_docs = []
-
-            for search_term in SEARCH_TERMS:
-                print(f"\n  Searching for '{search_term}'...")
+            corpus = None
+            if output_format == "ndjson":
+                corpus = NdjsonCorpus(output_dir / NDJSON_FILENAME)
+                stack.push_async_callback(corpus.close)
+                existing_ids = corpus.ids()
+            else:
+                existing_ids = existing_document_ids(output_dir)
 
-                docs = await fetch_all_documents(
-                    client, search_term, doc_type, limit
-                )
-
-                # Track unique documents (avoid duplicates across search terms)
-                for doc in docs:
-                    doc["_search_term"] = search_term
-                    if not any(d["id"] == doc["id"] for d in type_docs):
-                        type_docs.append(doc)
-
-            stats[doc_type].total_found = len(type_docs)
-            print(f"\n  Total unique documents: {len(type_docs):,}")
+            # Content hashes only count for documents actually on disk
+            hashes = ContentHashes.load(
+                output_dir / HASHES_FILENAMES[output_format], existing_ids
+            )
 
+            print(f"\n  Searching for {', '.join(map(repr, SEARCH_TERMS))}...")
             if dry_run:
                 print("  [DRY RUN - skipping downloads]")
-                continue
-
-            # Download content
-            print(f"  Downloading content...")
-
-            for i, doc in enumerate(type_docs, 1):
-                doc_id = doc.get("id", "")
-                if not doc_id:
-                    stats[doc_type].skipped += 1
-                    continue
-
-                # Check if already downloaded
-                existing = list(output_dir.glob(f"*_{doc_id}_*.txt"))
-                if existing:
-                    stats[doc_type].skipped += 1
-                    continue
-
-                content = await download_document_content(client, doc_id)
-
-                if content:
-                    save_document(
-                        content,
-                        doc,
-                        doc["_search_term"],
+            else:
+                print(f"  Downloading content...")
+
+            # Documents flow from the searches to the download workers page
+            # by page; None tells a worker to stop. With the bounded queues
+            # and prefetch windows, only a few pages of metadata per search
+            # term are held at a time
+            num_workers = 0 if dry_run else MAX_CONCURRENT_DOWNLOADS
+            queue = None if dry_run else asyncio.Queue(PAGE_SIZE)
+            progress = Progress()
+
+            # All searches start at once, each buffering a few pages ahead
+            searches = {
+                search_term: asyncio.Queue(PREFETCH_PAGES)
+                for search_term in SEARCH_TERMS
+            }
+
+            # A failure anywhere must stop the rest: dead workers would leave
+            # the searches blocked on a full queue, and vice versa
+            await run_all(
+                *(
+                    buffer_pages(
+                        iter_document_pages(
+                            client, semaphore, search_term, doc_type, limit
+                        ),
+                        pages,
+                    )
+                    for search_term, pages in searches.items()
+                ),
+                find_new_documents(
+                    searches,
+                    existing_ids,
+                    hashes,
+                    queue,
+                    num_workers,
+                    stats[doc_type],
+                    progress,
+                ),
+                *(
+                    download_documents(
+                        client,
+                        semaphore,
+                        queue,
                         output_dir,
+                        corpus,
+                        hashes,
+                        stats[doc_type],
+                        progress,
                     )
-                    stats[doc_type].downloaded += 1
-                else:
-                    stats[doc_type].failed += 1
+                    for _ in range(num_workers)
+                ),
+            )
 
-                if i % 50 == 0 or i == len(type_docs):
-                    print(f"    Progress: {i:,}/{len(type_docs):,}")
-
-                await asyncio.sleep(0.05)  # Rate limiting
+            print(f"\n  Total unique documents: {stats[doc_type].total_found:,}")
 
     return stats
 
@@ -282,38 +890,44 @@ def print_summary(stats: dict[str, DownloadStats]) -> None:
     print("DOWNLOAD SUMMARY")
     print("=" * 60)
 
-    total_found = 0
-    total_downloaded = 0
-    total_failed = 0
-    total_skipped = 0
-
     for doc_type, folder_name in DOCUMENT_TYPES.items():
         s = stats[doc_type]
         print(f"\n{folder_name}/ ({doc_type}):")
         print(f"  Found:      {s.total_found:,}")
         print(f"  Downloaded: {s.downloaded:,}")
         print(f"  Skipped:    {s.skipped:,}")
+        print(f"  Duplicates: {s.duplicates:,}")
         print(f"  Failed:     {s.failed:,}")
 
-        total_found += s.total_found
-        total_downloaded += s.downloaded
-        total_failed += s.failed
-        total_skipped += s.skipped
+    total = sum(stats.values(), DownloadStats())
 
     print(f"\nTOTAL:")
-    print(f"  Found:      {total_found:,}")
-    print(f"  Downloaded: {total_downloaded:,}")
-    print(f"  Skipped:    {total_skipped:,}")
-    print(f"  Failed:     {total_failed:,}")
+    print(f"  Found:      {total.total_found:,}")
+    print(f"  Downloaded: {total.downloaded:,}")
+    print(f"  Skipped:    {total.skipped:,}")
+    print(f"  Duplicates: {total.duplicates:,}")
+    print(f"  Failed:     {total.failed:,}")
 
     # Calculate disk usage
     print(f"\nDisk usage:")
     for folder_name in DOCUMENT_TYPES.values():
         folder = DATA_DIR / folder_name
         if folder.exists():
-            files = list(folder.glob("*.txt"))
-            size_mb = sum(f.stat().st_size for f in files) / (1024 * 1024)
-            print(f"  {folder_name}/: {len(files):,} files, {size_mb:.1f} MB")
+            num_files = 0
+            total_size = 0
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".txt"):
+                        num_files += 1
+                        total_size += entry.stat().st_size
+
+            size_mb = total_size / (1024 * 1024)
+            print(f"  {folder_name}/: {num_files:,} files, {size_mb:.1f} MB")
+
+            corpus_file = folder / NDJSON_FILENAME
+            if corpus_file.exists():
+                size_mb = corpus_file.stat().st_size / (1024 * 1024)
+                print(f"  {folder_name}/{NDJSON_FILENAME}: {size_mb:.1f} MB")
 
 
 async def main():
@@ -332,6 +946,14 @@ async def main():
         help="Limit documents per type/term (for testing)",
     )
 
+    parser.add_argument(
+        "--format",
+        choices=["txt", "ndjson"],
+        default="txt",
+        help="Save one .txt file per document (default) or one "
+        f"{NDJSON_FILENAME} per document type",
+    )
+
     args = parser.parse_args()
 
     print("Riksdagen AI Discourse Corpus Downloader")
@@ -346,10 +968,17 @@ async def main():
     stats = await download_corpus(
         dry_run=args.dry_run,
         limit=args.limit,
+        output_format=args.format,
     )
 
     print_summary(stats)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is a faster event loop where available (not on Windows)
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())